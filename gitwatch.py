@@ -4,70 +4,199 @@ AutoPull - Automated Git Repository Monitoring and Deployment Tool
 
 Usage:
     ./autopull.py              # Setup mode
-    ./autopull.py --mode service    # Service mode
+    ./autopull.py --mode service    # Service mode (polling or webhook)
     ./autopull.py --help           # Show help
 """
 
 import os
 import sys
 import time
+import re
 import json
+import hmac
+import hashlib
+import queue
+import secrets
+import threading
+import tempfile
 import subprocess
 import argparse
 import signal
-from datetime import datetime
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
 from pathlib import Path
 
 try:
     import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
 except ImportError:
     print("Error: requests library not found. Install with: pip install requests")
     sys.exit(1)
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 CONFIG_FILE = ".autopull-config"
 GITWATCH_LOG = "gitwatch.log"
+# Media type that makes the commits endpoint return just the commit SHA
+SHA_MEDIA_TYPE = 'application/vnd.github.sha'
+_SHA_RE = re.compile(rb'[0-9a-f]{40}')
+_REPO_RE = re.compile(r'github\.com[:/]([^/]+)/([^/]+?)(?:\.git)?/?$')
+OUTPUT_TAIL_SIZE = 64 * 1024  # bytes of command output kept for logging
 CHECK_INTERVAL = 60  # seconds
+MAX_CHECK_INTERVAL = 600  # seconds, cap for backoff while the branch is idle
+DEFAULT_WEBHOOK_PORT = 8765
+MAX_WEBHOOK_PAYLOAD = 25 * 1024 * 1024  # bytes, GitHub's webhook payload cap
 
 class AutoPull:
     def __init__(self):
         self.config = {}
         self.running = True
+        self._stop = threading.Event()
+        # The poll/webhook threads and the post-pull worker log concurrently;
+        # reentrant because the signal handler logs on the main thread
+        self._log_lock = threading.RLock()
+        try:
+            self._logf = open(GITWATCH_LOG, 'a', encoding='utf-8', buffering=1)
+        except Exception as e:
+            self._logf = None
+            print(f"[WARN] Failed to open log file: {e}")
+        self._pull_lock = threading.Lock()
+        # Single slot: a newer commit replaces a post-pull run that hasn't started yet
+        self._build_q = queue.Queue(maxsize=1)
+        self._build_thread = None
+        # Held while the post-pull command runs so the tree isn't reset under it
+        self._build_lock = threading.Lock()
+        self._etag = None
+        self._commit_headers = {'Accept': SHA_MEDIA_TYPE}
+        self._last_sha = None
+        self._retry_delay = None
+        self._poll_interval = CHECK_INTERVAL
+        self._miss_streak = 0
+        self._repo_private = None
+        self._git = None
+        self._git_lock = threading.Lock()
+        self._config_stat = None
+        self._git_dir = None
+        self._commit_url = None
+        self._branch_ref = None
+        self._remote_ref_path = None
+        self._ls_remote_cmd = None
+        self.session = requests.Session()
+        self.session.headers.update({
+            'Accept': 'application/vnd.github+json',
+            'User-Agent': 'gitwatch',
+        })
+        # Keep the connection to api.github.com alive between polls
+        # Rate limits (429, Retry-After) are left to the service loop so waits stay interruptible
+        retry = Retry(
+            total=3,
+            backoff_factor=1,
+            status_forcelist=[502, 503, 504],
+            respect_retry_after_header=False,
+            raise_on_status=False
+        )
+        self.session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=2, max_retries=retry))
         
     def log(self, message):
         """Print timestamped log message and append to log file"""
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        timestamp = time.strftime("%Y-%m-%d %H:%M:%S")
         log_message = f"[{timestamp}] {message}"
-        print(log_message)
-        try:
-            with open(GITWATCH_LOG, 'a', encoding='utf-8') as logf:
-                logf.write(log_message + '\n')
-        except Exception as e:
-            print(f"[WARN] Failed to write to log file: {e}")
+        with self._log_lock:
+            print(log_message, flush=True)
+            if self._logf:
+                try:
+                    self._logf.write(log_message + '\n')
+                except Exception as e:
+                    print(f"[WARN] Failed to write to log file: {e}")
+                
+    def close(self):
+        """Flush and close the log file and release network resources"""
+        self.session.close()
+        if self._logf:
+            self._logf.flush()
+            os.fsync(self._logf.fileno())
+            self._logf.close()
+            self._logf = None
         
     def load_config(self):
-        """Load configuration from file"""
-        if not os.path.exists(CONFIG_FILE):
+        """Load configuration from file, re-parsing only when it has changed"""
+        try:
+            st = os.stat(CONFIG_FILE)
+        except FileNotFoundError:
             return False
+        
+        config_stat = (st.st_mtime_ns, st.st_size)
+        if config_stat == self._config_stat:
+            return True
             
         try:
-            with open(CONFIG_FILE, 'r') as f:
-                self.config = json.load(f)
+            if orjson:
+                with open(CONFIG_FILE, 'rb') as f:
+                    self.config = orjson.loads(f.read())
+            else:
+                with open(CONFIG_FILE, 'r') as f:
+                    self.config = json.load(f)
+            self.bind_config()
+            self.update_session()
+            self._config_stat = config_stat
             return True
         except Exception as e:
+            # Don't leave a half-loaded config behind for setup to build on
+            self.config = {}
+            self._config_stat = None
             self.log(f"Error loading config: {e}")
             return False
             
+    def bind_config(self):
+        """Precompute the paths, URLs and commands the service loop uses on every check"""
+        branch = self.config['branch']
+        self._git_dir = os.path.join(self.config['local_path'], '.git')
+        self._branch_ref = f"refs/heads/{branch}"
+        self._remote_ref_path = os.path.join(self._git_dir, 'refs', 'remotes', 'origin', branch)
+        self._commit_url = f"https://api.github.com/repos/{self.config['repo_owner']}/{self.config['repo_name']}/commits/{branch}"
+        # Protocol v2 lets the server filter refs instead of advertising all of them
+        self._ls_remote_cmd = ['git', '-c', 'protocol.version=2', 'ls-remote', 'origin', self._branch_ref]
+        
+    def update_session(self):
+        """Apply the configured token to the shared HTTP session"""
+        if self.config.get('github_token'):
+            self.session.headers['Authorization'] = f"token {self.config['github_token']}"
+            
     def save_config(self):
         """Save configuration to file"""
         try:
-            with open(CONFIG_FILE, 'w') as f:
-                json.dump(self.config, f, indent=2)
+            if orjson:
+                with open(CONFIG_FILE, 'wb') as f:
+                    f.write(orjson.dumps(self.config, option=orjson.OPT_INDENT_2))
+            else:
+                with open(CONFIG_FILE, 'w') as f:
+                    json.dump(self.config, f, indent=2)
             os.chmod(CONFIG_FILE, 0o600)  # Secure permissions
             return True
         except Exception as e:
             self.log(f"Error saving config: {e}")
             return False
             
+    def _prompt(self, msg, validate=lambda s: bool(s), help_text=None, error="Invalid value!"):
+        """Prompt until the stripped input passes validate, printing help_text once"""
+        if help_text:
+            print(help_text)
+        while True:
+            value = input(msg).strip()
+            if validate(value):
+                return value
+            print(error)
+            
+    def _parse_repo_url(self, repo_url):
+        """Extract (owner, repo) from a GitHub repository URL, or None if it isn't one"""
+        m = _REPO_RE.search(repo_url)
+        if m:
+            return m.group(1), m.group(2)
+        return None
+        
     def setup_mode(self):
         """Interactive setup mode"""
         self.log("AutoPull Setup Mode")
@@ -80,6 +209,10 @@ class AutoPull:
             print(f"Branch: {self.config.get('branch', 'N/A')}")
             print(f"Local path: {self.config.get('local_path', 'N/A')}")
             print(f"Post-command: {self.config.get('post_command', 'None')}")
+            if self.config.get('webhook'):
+                print(f"Webhook port: {self.config.get('webhook_port', DEFAULT_WEBHOOK_PORT)}")
+            else:
+                print("Webhook: disabled (polling)")
             
             reconfigure = input("\nReconfigure? (y/n): ").lower()
             if reconfigure != 'y':
@@ -88,47 +221,27 @@ class AutoPull:
             
             # Clear existing config for reconfiguration
             self.config = {}
+            self._config_stat = None
         
         # Get GitHub token
-        print("\nGitHub Personal Access Token is required.")
-        print("Create one at: https://github.com/settings/tokens")
-        print("Required permissions: 'repo' (for private repos) or 'public_repo' (for public repos)")
-        
-        while True:
-            token = input("\nEnter your GitHub Personal Access Token: ").strip()
-            if token:
-                self.config['github_token'] = token
-                break
-            print("Token cannot be empty!")
-            print("\nGitHub Personal Access Token is required.")
-            print("Create one at: https://github.com/settings/tokens")
-            print("Required permissions: 'repo' (for private repos) or 'public_repo' (for public repos)")
-            
-            while True:
-                token = input("\nEnter your GitHub Personal Access Token: ").strip()
-                if token:
-                    self.config['github_token'] = token
-                    break
-                print("Token cannot be empty!")
+        self.config['github_token'] = self._prompt(
+            "\nEnter your GitHub Personal Access Token: ",
+            help_text=(
+                "\nGitHub Personal Access Token is required.\n"
+                "Create one at: https://github.com/settings/tokens\n"
+                "Required permissions: 'repo' (for private repos) or 'public_repo' (for public repos)"
+            ),
+            error="Token cannot be empty!"
+        )
         
         # Get repository URL
-        while True:
-            repo_url = input("\nEnter GitHub repository URL (https://github.com/user/repo): ").strip()
-            if repo_url:
-                # Extract owner/repo from URL
-                try:
-                    if 'github.com/' in repo_url:
-                        parts = repo_url.rstrip('/').split('/')
-                        if len(parts) >= 2:
-                            owner = parts[-2]
-                            repo = parts[-1].replace('.git', '')
-                            self.config['repo_owner'] = owner
-                            self.config['repo_name'] = repo
-                            self.config['repo_url'] = repo_url
-                            break
-                except:
-                    pass
-            print("Please enter a valid GitHub repository URL!")
+        repo_url = self._prompt(
+            "\nEnter GitHub repository URL (https://github.com/user/repo): ",
+            validate=lambda s: self._parse_repo_url(s) is not None,
+            error="Please enter a valid GitHub repository URL!"
+        )
+        self.config['repo_owner'], self.config['repo_name'] = self._parse_repo_url(repo_url)
+        self.config['repo_url'] = repo_url
         
         # Get local repository path
         current_dir = os.getcwd()
@@ -143,8 +256,30 @@ class AutoPull:
         branch = input("\nBranch to monitor (default: main): ").strip()
         self.config['branch'] = branch if branch else 'main'
         
+        # Get webhook settings (falls back to polling when disabled)
+        use_webhook = input("\nReceive GitHub push webhooks instead of polling? (y/n): ").lower()
+        self.config['webhook'] = use_webhook == 'y'
+        if self.config['webhook']:
+            port = self._prompt(
+                f"\nWebhook listen port (default: {DEFAULT_WEBHOOK_PORT}): ",
+                validate=lambda s: not s or (s.isdigit() and 0 < int(s) < 65536),
+                error="Please enter a valid port number!"
+            )
+            self.config['webhook_port'] = int(port) if port else DEFAULT_WEBHOOK_PORT
+            
+            secret = input("\nWebhook secret (leave empty to generate one): ").strip()
+            self.config['webhook_secret'] = secret if secret else secrets.token_hex(20)
+            print(f"\nAdd a webhook at https://github.com/{self.config['repo_owner']}/{self.config['repo_name']}/settings/hooks")
+            print(f"  Payload URL: http://<this-host>:{self.config['webhook_port']}/")
+            print("  Content type: application/json")
+            print(f"  Secret: {self.config['webhook_secret']}")
+            print("  Events: Just the push event")
+        
         # Verify repository exists and is accessible
+        self.update_session()
         if self.verify_repository():
+            # Public repos can be checked with git itself, without using API quota
+            self.config['use_ls_remote'] = self._repo_private is False
             if self.save_config():
                 self.log("Configuration saved successfully!")
                 print(f"\nSetup complete! Run '{sys.argv[0]} --mode service' to start monitoring.")
@@ -160,11 +295,11 @@ class AutoPull:
     def verify_repository(self):
         """Verify that the repository is accessible"""
         try:
-            headers = {'Authorization': f'token {self.config["github_token"]}'}
             url = f"https://api.github.com/repos/{self.config['repo_owner']}/{self.config['repo_name']}"
             
-            response = requests.get(url, headers=headers, timeout=10)
+            response = self.session.get(url, timeout=10)
             if response.status_code == 200:
+                self._repo_private = response.json().get('private')
                 self.log("Repository access verified ✓")
                 return True
             elif response.status_code == 404:
@@ -178,15 +313,60 @@ class AutoPull:
         return False
         
     def get_latest_commit_sha(self):
-        """Get the latest commit SHA from GitHub"""
+        """Get the latest commit SHA, preferring git ls-remote over the REST API"""
+        if self.config.get('use_ls_remote') and os.path.isdir(self._git_dir):
+            sha = self.get_latest_commit_sha_git()
+            if sha:
+                return sha
+                
+        return self.get_latest_commit_sha_api()
+        
+    def get_latest_commit_sha_git(self):
+        """Get the latest commit SHA of the branch on origin using git ls-remote"""
         try:
-            headers = {'Authorization': f'token {self.config["github_token"]}'}
-            url = f"https://api.github.com/repos/{self.config['repo_owner']}/{self.config['repo_name']}/commits/{self.config['branch']}"
+            result = subprocess.run(
+                self._ls_remote_cmd,
+                cwd=self.config['local_path'],
+                capture_output=True,
+                text=True,
+                check=True,
+                timeout=30
+            )
+            fields = result.stdout.split()
+            if fields:
+                # Rate-limit hints from an earlier REST fallback no longer apply
+                self._retry_delay = None
+                self._poll_interval = CHECK_INTERVAL
+                return fields[0]
+            self.log(f"Branch {self.config['branch']} not found on origin")
+            
+        except Exception as e:
+            self.log(f"Error running git ls-remote: {e}")
             
-            response = requests.get(url, headers=headers, timeout=10)
+        return None
+        
+    def get_latest_commit_sha_api(self):
+        """Get the latest commit SHA from the GitHub REST API"""
+        try:
+            response = self.session.get(self._commit_url, headers=self._commit_headers, timeout=10)
+            self._retry_delay = self.rate_limit_delay(response)
+            poll_interval = response.headers.get('X-Poll-Interval')
+            if poll_interval and poll_interval.isdigit():
+                self._poll_interval = int(poll_interval)
             if response.status_code == 200:
-                commit_data = response.json()
-                return commit_data['sha']
+                match = _SHA_RE.fullmatch(response.content.strip())
+                if not match:
+                    self.log("Error fetching commit: unexpected response body")
+                    return None
+                self._etag = response.headers.get('ETag')
+                # 304 responses don't count against the rate limit
+                self._commit_headers = {'Accept': SHA_MEDIA_TYPE}
+                if self._etag:
+                    self._commit_headers['If-None-Match'] = self._etag
+                self._last_sha = match.group().decode('ascii')
+                return self._last_sha
+            elif response.status_code == 304:
+                return self._last_sha
             else:
                 self.log(f"Error fetching commit: HTTP {response.status_code}")
                 
@@ -195,75 +375,220 @@ class AutoPull:
             
         return None
         
+    def next_check_delay(self):
+        """Seconds to wait before the next check
+        
+        Backs off exponentially while the branch is unchanged, never polls faster
+        than GitHub's X-Poll-Interval, and waits out rate limits when told to.
+        """
+        if self._retry_delay:
+            return max(self._retry_delay, CHECK_INTERVAL)
+            
+        backoff = min(CHECK_INTERVAL * 2 ** min(self._miss_streak, 10), MAX_CHECK_INTERVAL)
+        return max(backoff, self._poll_interval)
+        
+    def rate_limit_delay(self, response):
+        """Return seconds to wait before the next API call, or None if not rate limited"""
+        retry_after = response.headers.get('Retry-After')
+        if retry_after and retry_after.isdigit():
+            return int(retry_after)
+            
+        if response.headers.get('X-RateLimit-Remaining') == '0':
+            reset = response.headers.get('X-RateLimit-Reset')
+            if reset and reset.isdigit():
+                return max(int(reset) - int(time.time()), 0) + 1
+                
+        return None
+        
+    def resolve_object(self, rev):
+        """Resolve a revision in the local repository to (sha, type), or None if missing
+        
+        Lookups go through a long-lived 'git cat-file --batch-check' process so
+        checks don't pay for a fork/exec and repository open each time.
+        """
+        if not os.path.isdir(self._git_dir):
+            return None
+            
+        with self._git_lock:
+            try:
+                if self._git is None or self._git.poll() is not None:
+                    self._git = subprocess.Popen(
+                        ['git', 'cat-file', '--batch-check=%(objectname) %(objecttype)'],
+                        cwd=self.config['local_path'],
+                        stdin=subprocess.PIPE,
+                        stdout=subprocess.PIPE,
+                        stderr=subprocess.DEVNULL,
+                        text=True,
+                        bufsize=1
+                    )
+                self._git.stdin.write(rev + '\n')
+                self._git.stdin.flush()
+                fields = self._git.stdout.readline().split()
+            except Exception as e:
+                self.log(f"Error querying local repository: {e}")
+                self.close_git()
+                return None
+                
+        if len(fields) != 2 or fields[1] == 'missing':
+            return None
+        return fields[0], fields[1]
+        
+    def local_head_sha(self):
+        """Return the commit SHA checked out locally, or None"""
+        obj = self.resolve_object('HEAD')
+        if obj and obj[1] == 'commit':
+            return obj[0]
+        return None
+        
+    def local_branch_sha(self):
+        """Read origin/<branch> straight from the remote-tracking ref file, or None
+        
+        Packed refs aren't consulted; a missing loose ref just means we can't
+        short-circuit the remote check.
+        """
+        try:
+            with open(self._remote_ref_path) as f:
+                return f.read().strip()
+        except OSError:
+            return None
+            
+    def close_git(self):
+        """Stop the long-lived git cat-file process"""
+        if self._git is not None:
+            try:
+                self._git.stdin.close()
+                self._git.wait(timeout=5)
+            except Exception:
+                self._git.kill()
+            self._git = None
+            
     def run_command(self, command, cwd=None):
-        """Run a shell command and return success status"""
+        """Run a command and return success status
+        
+        Lists are executed directly without a shell. Strings (the user's
+        post-pull command) keep full shell semantics.
+        """
         try:
-            result = subprocess.run(
-                command, 
-                shell=True, 
-                cwd=cwd or self.config['local_path'],
-                capture_output=True, 
-                text=True
-            )
+            # Output goes to a temp file so noisy commands can't grow memory;
+            # only the tail is read back
+            with tempfile.TemporaryFile() as output:
+                result = subprocess.run(
+                    command, 
+                    shell=isinstance(command, str), 
+                    cwd=cwd or self.config['local_path'],
+                    stdout=output,
+                    stderr=subprocess.STDOUT
+                )
+                
+                size = output.seek(0, os.SEEK_END)
+                output.seek(max(size - OUTPUT_TAIL_SIZE, 0))
+                tail = output.read().decode('utf-8', errors='replace')
             
-            if result.returncode == 0:
-                return True, result.stdout
-            else:
-                return False, result.stderr
+            return result.returncode == 0, tail
                 
         except Exception as e:
             return False, str(e)
             
-    def pull_repository(self):
-        """Pull latest changes from repository"""
+    def pull_repository(self, sha=None):
+        """Pull latest changes from repository and queue the post-pull command"""
         self.log("Pulling latest changes...")
         
         # Ensure we're in a git repository
-        if not os.path.exists(os.path.join(self.config['local_path'], '.git')):
+        if not os.path.isdir(self._git_dir):
             self.log("Not a git repository. Cloning...")
-            success, output = self.run_command(f"git clone {self.config['repo_url']} .", cwd=self.config['local_path'])
+            # A blobless partial clone; later fetches inherit the filter from the remote config
+            success, output = self.run_command(['git', 'clone', '--filter=blob:none', self.config['repo_url'], '.'], cwd=self.config['local_path'])
             if not success:
                 self.log(f"Clone failed: {output}")
                 return False
         
-        # Pull changes
-        success, output = self.run_command(f"git pull origin {self.config['branch']}")
+        # Fetch the branch tip and move the working tree to it
+        success, output = self.run_command(['git', 'fetch', '--depth=1', 'origin', self.config['branch']])
+        if success:
+            with self._build_lock:
+                success, output = self.run_command(['git', 'reset', '--hard', 'FETCH_HEAD'])
         if success:
             self.log("Pull successful ✓")
             
-            # Run post-pull command if specified
+            # Run post-pull command if specified, without blocking further checks
             if self.config.get('post_command'):
-                self.log(f"Running post-pull command: {self.config['post_command']}")
-                success, output = self.run_command(self.config['post_command'])
-                if success:
-                    self.log("Post-pull command completed ✓")
-                else:
-                    self.log(f"Post-pull command failed: {output}")
+                self.queue_post_command(sha)
             
             return True
         else:
             self.log(f"Pull failed: {output}")
             return False
             
+    def queue_post_command(self, sha):
+        """Hand a post-pull run to the background worker, coalescing pending runs"""
+        if self._build_thread is None or not self._build_thread.is_alive():
+            self._build_thread = threading.Thread(target=self.post_command_worker, daemon=True)
+            self._build_thread.start()
+            
+        try:
+            self._build_q.put_nowait(sha)
+        except queue.Full:
+            # A run is already waiting; the most recent commit wins
+            try:
+                self._build_q.get_nowait()
+            except queue.Empty:
+                pass
+            self._build_q.put_nowait(sha)
+            
+    def post_command_worker(self):
+        """Run queued post-pull commands one at a time until shutdown"""
+        while not self._stop.is_set():
+            try:
+                sha = self._build_q.get(timeout=1)
+            except queue.Empty:
+                continue
+                
+            target = f" ({sha[:8]})" if sha else ""
+            try:
+                with self._build_lock:
+                    self.log(f"Running post-pull command{target}: {self.config['post_command']}")
+                    success, output = self.run_command(self.config['post_command'])
+                if success:
+                    self.log(f"Post-pull command completed{target} ✓")
+                else:
+                    self.log(f"Post-pull command failed{target}: {output}")
+            except Exception as e:
+                self.log(f"Post-pull command error{target}: {e}")
+                
     def service_mode(self):
         """Run in service mode - continuously monitor for changes"""
         if not self.load_config():
             self.log("Error: No configuration found. Run setup first.")
             return False
+        
+        if self.config.get('webhook'):
+            return self.webhook_mode()
             
         self.log("Starting AutoPull service mode")
         self.log(f"Monitoring: {self.config['repo_owner']}/{self.config['repo_name']} ({self.config['branch']})")
-        self.log(f"Check interval: {CHECK_INTERVAL} seconds")
+        self.log(f"Check interval: {CHECK_INTERVAL}-{MAX_CHECK_INTERVAL} seconds")
         
         # Set up signal handlers for graceful shutdown
         signal.signal(signal.SIGINT, self.signal_handler)
         signal.signal(signal.SIGTERM, self.signal_handler)
         
         last_commit_sha = None
+        last_remote_check = 0
+        skip_factor = self.config.get('check_skip_factor', 1)
         
         while self.running:
             try:
+                # While origin/<branch> on disk still matches the last seen commit,
+                # only ask the remote every skip_factor check delays (including backoff)
+                delay = self.next_check_delay()
+                if (last_commit_sha and self.local_branch_sha() == last_commit_sha
+                        and time.monotonic() - last_remote_check < skip_factor * delay):
+                    if self._stop.wait(delay):
+                        break
+                    continue
+                    
                 current_commit_sha = self.get_latest_commit_sha()
+                last_remote_check = time.monotonic()
                 
                 if current_commit_sha:
                     if last_commit_sha is None:
@@ -272,25 +597,151 @@ class AutoPull:
                         self.log(f"Initial commit: {current_commit_sha[:8]}")
                     elif current_commit_sha != last_commit_sha:
                         # New commit detected
+                        self._miss_streak = 0
                         self.log(f"New commit detected: {current_commit_sha[:8]}")
-                        if self.pull_repository():
+                        if self.local_head_sha() == current_commit_sha:
+                            last_commit_sha = current_commit_sha
+                            self.log("Local repository already up to date ✓")
+                        elif self.pull_repository(current_commit_sha):
                             last_commit_sha = current_commit_sha
                             self.log("Update completed successfully ✓")
                         else:
                             self.log("Update failed ✗")
-                    # else: no changes
+                    else:
+                        # No changes - check less often
+                        self._miss_streak += 1
                 else:
                     self.log("Failed to check for updates")
                 
-                # Wait before next check
-                time.sleep(CHECK_INTERVAL)
+                # Wait before next check, or until the rate limit resets
+                delay = self.next_check_delay()
+                if self._retry_delay:
+                    self.log(f"Rate limited by GitHub, waiting {delay} seconds")
+                if self._stop.wait(delay):
+                    break
                 
             except KeyboardInterrupt:
                 break
             except Exception as e:
                 self.log(f"Unexpected error: {e}")
-                time.sleep(CHECK_INTERVAL)
+                if self._stop.wait(CHECK_INTERVAL):
+                    break
+        
+        self.close_git()
+        self.log("AutoPull service stopped")
+        return True
         
+    def verify_signature(self, body, signature):
+        """Check an X-Hub-Signature-256 header against the shared webhook secret"""
+        secret = self.config.get('webhook_secret')
+        if not secret or not signature:
+            return False
+        expected = 'sha256=' + hmac.new(secret.encode('utf-8'), body, hashlib.sha256).hexdigest()
+        return hmac.compare_digest(expected.encode('utf-8'), signature.encode('utf-8'))
+        
+    def handle_push(self, payload):
+        """Pull when a push event targets the monitored branch"""
+        if payload.get('ref') != self._branch_ref:
+            return
+        if payload.get('deleted'):
+            self.log(f"Branch {self.config['branch']} was deleted on GitHub, ignoring push")
+            return
+        
+        after = payload.get('after') or ''
+        self.log(f"Push received: {after[:8]}")
+        # Deliveries run on their own threads; never pull concurrently
+        with self._pull_lock:
+            if after and self.local_head_sha() == after:
+                self.log("Local repository already up to date ✓")
+            elif self.pull_repository(after or None):
+                self.log("Update completed successfully ✓")
+            else:
+                self.log("Update failed ✗")
+                
+    def webhook_mode(self):
+        """Run in service mode - pull when GitHub delivers a push webhook"""
+        autopull = self
+        
+        class WebhookHandler(BaseHTTPRequestHandler):
+            # Drop clients that stall mid-request instead of holding a thread forever
+            timeout = 10
+            
+            def do_POST(self):
+                # Validate the length before reading anything from an unauthenticated client
+                try:
+                    length = int(self.headers.get('Content-Length', 0))
+                except ValueError:
+                    length = -1
+                if length < 0:
+                    self.reply(400)
+                    return
+                if length > MAX_WEBHOOK_PAYLOAD:
+                    self.reply(413)
+                    return
+                try:
+                    body = self.rfile.read(length)
+                except OSError as e:
+                    autopull.log(f"Dropped webhook delivery while reading body: {e}")
+                    self.close_connection = True
+                    return
+                
+                if not autopull.verify_signature(body, self.headers.get('X-Hub-Signature-256')):
+                    autopull.log("Rejected webhook delivery: invalid signature")
+                    self.reply(401)
+                    return
+                    
+                try:
+                    payload = json.loads(body)
+                except ValueError:
+                    self.reply(400)
+                    return
+                
+                # Acknowledge right away and pull on another thread so slow clones
+                # or fetches don't run into GitHub's delivery timeout
+                self.reply(202)
+                
+                if self.headers.get('X-GitHub-Event') == 'push':
+                    threading.Thread(target=autopull.handle_push, args=(payload,), daemon=True).start()
+                    
+            def reply(self, status):
+                # An explicit empty body lets the client finish reading immediately
+                self.send_response(status)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                
+
+            def log_message(self, format, *args):
+                # Keep request logging out of stderr; deliveries are logged above
+                pass
+        
+        port = self.config.get('webhook_port', DEFAULT_WEBHOOK_PORT)
+        try:
+            server = ThreadingHTTPServer(('', port), WebhookHandler)
+        except OSError as e:
+            self.log(f"Error: Could not listen on port {port}: {e}")
+            return False
+        
+        self.log("Starting AutoPull service mode (webhook)")
+        self.log(f"Monitoring: {self.config['repo_owner']}/{self.config['repo_name']} ({self.config['branch']})")
+        self.log(f"Listening for push events on port {port}")
+        
+        # Set up signal handlers for graceful shutdown
+        signal.signal(signal.SIGINT, self.signal_handler)
+        signal.signal(signal.SIGTERM, self.signal_handler)
+        
+        server_thread = threading.Thread(target=server.serve_forever, daemon=True)
+        server_thread.start()
+        
+        try:
+            # Wake up periodically so KeyboardInterrupt is still delivered
+            while not self._stop.wait(1):
+                pass
+        except KeyboardInterrupt:
+            pass
+        
+        server.shutdown()
+        server.server_close()
+        self.close_git()
         self.log("AutoPull service stopped")
         return True
         
@@ -298,6 +749,10 @@ class AutoPull:
         """Handle shutdown signals gracefully"""
         self.log("Received shutdown signal, stopping...")
         self.running = False
+        self._stop.set()
+        if self._logf:
+            self._logf.flush()
+            os.fsync(self._logf.fileno())
 
     def testing_mode(self):
         """Test configuration and environment for errors before running as a service"""
@@ -324,23 +779,22 @@ class AutoPull:
 
         # 3. Check if local path is a git repo
         print("[TEST] Checking local repository...")
-        git_dir = os.path.join(self.config['local_path'], '.git')
-        if not os.path.exists(git_dir):
+        if not os.path.isdir(self._git_dir):
             print("[TEST] Local path is not a git repository. Will attempt to clone.")
             # Try to clone with --no-checkout to avoid side effects
-            success, output = self.run_command(f"git clone --no-checkout {self.config['repo_url']} .", cwd=self.config['local_path'])
+            success, output = self.run_command(['git', 'clone', '--no-checkout', self.config['repo_url'], '.'], cwd=self.config['local_path'])
             if not success:
                 print(f"[TEST] FAIL: Could not clone repository: {output}")
                 return False
             print("[TEST] Clone simulated OK.")
         else:
-            # Try a dry-run pull
-            print("[TEST] Simulating git pull...")
-            success, output = self.run_command(f"git pull --dry-run origin {self.config['branch']}")
+            # Try a dry-run fetch
+            print("[TEST] Simulating git fetch...")
+            success, output = self.run_command(['git', 'fetch', '--dry-run', '--depth=1', 'origin', self.config['branch']])
             if success:
-                print("[TEST] git pull --dry-run OK.")
+                print("[TEST] git fetch --dry-run OK.")
             else:
-                print(f"[TEST] FAIL: git pull --dry-run failed: {output}")
+                print(f"[TEST] FAIL: git fetch --dry-run failed: {output}")
                 return False
 
         # 4. Simulate post-pull command
@@ -376,16 +830,19 @@ Examples:
     
     autopull = AutoPull()
     
-    if args.mode == 'service':
-        if not autopull.service_mode():
-            sys.exit(1)
-    elif args.mode == 'testing':
-        if not autopull.testing_mode():
-            sys.exit(1)
-    else:
-        # Setup mode (default)
-        if not autopull.setup_mode():
-            sys.exit(1)
+    try:
+        if args.mode == 'service':
+            ok = autopull.service_mode()
+        elif args.mode == 'testing':
+            ok = autopull.testing_mode()
+        else:
+            # Setup mode (default)
+            ok = autopull.setup_mode()
+    finally:
+        autopull.close()
+        
+    if not ok:
+        sys.exit(1)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file